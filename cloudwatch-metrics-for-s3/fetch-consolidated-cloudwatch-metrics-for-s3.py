@@ -14,6 +14,13 @@ import datetime
 import os
 
 import boto3
+from lambda_instrumentation import instrument_handler, instrument_boto3, phase, count
+from lambda_retry import start_invocation, retry_call, BOTOCORE_CONFIG, DEFAULT_RETRY_BUDGET
+
+
+# retries allowed for a tenth of the CloudWatch calls, within these bounds
+RETRY_BUDGET_RATIO = 0.1
+MAX_RETRY_BUDGET = 200
 
 
 def get_metric_from_response(response):
@@ -23,6 +30,7 @@ def get_metric_from_response(response):
     else:
         return 0
 
+@instrument_handler
 def lambda_handler(event, context):
     account_name = event['account_name']
     storage_types = {
@@ -62,16 +70,28 @@ def lambda_handler(event, context):
             secret_access_key = os.getenv(account_name + '_secret_access_key')
         session = boto3.Session(aws_access_key_id=account_access_key, 
                                 aws_secret_access_key=secret_access_key, )
+        # AWSCalls.cloudwatch.GetMetricStatistics / Buckets gives calls per bucket
+        instrument_boto3(session)
         
         s3 = session.resource('s3')
         
-        cloudwatch = session.resource('cloudwatch')
+        cloudwatch = session.resource('cloudwatch', config=BOTOCORE_CONFIG)
         size_metric = cloudwatch.Metric('AWS/S3', 'BucketSizeBytes')
         objects_metric = cloudwatch.Metric('AWS/S3', 'NumberOfObjects')
         
-        for bucket in s3.buckets.all():
+        buckets = list(s3.buckets.all())
+        # botocore does not retry the CloudWatch calls: NumberOfObjects and each
+        # storage type per bucket. The budget grows with the calls but stays
+        # bounded, so sustained throttling fails the run instead of retrying every call
+        calls = len(buckets) * (1 + len(storage_types))
+        budget = min(MAX_RETRY_BUDGET, max(DEFAULT_RETRY_BUDGET, int(calls * RETRY_BUDGET_RATIO)))
+        start_invocation(context, budget=budget)
+
+        for bucket in buckets:
             print(bucket.name)
-            response = objects_metric.get_statistics(
+            count('Buckets')
+            response = retry_call(
+                objects_metric.get_statistics,
                 Dimensions=[
                     {'Name': 'BucketName', 'Value': bucket.name},
                     {'Name': 'StorageType', 'Value': 'AllStorageTypes'},
@@ -90,7 +110,8 @@ def lambda_handler(event, context):
             
             for key, storage_type in storage_types.items():
                 
-                response = size_metric.get_statistics(
+                response = retry_call(
+                    size_metric.get_statistics,
                     Dimensions=[
                         {'Name': 'BucketName', 'Value': bucket.name},
                         {'Name': 'StorageType', 'Value': storage_type},
@@ -103,7 +124,8 @@ def lambda_handler(event, context):
             
             writer.writerow(payload)
     
-    s3_current = boto3.resource('s3')
-    s3_current.Bucket('as-cloudwatch-metrics-for-s3').upload_file(output_filename, metric_start_date.strftime(f'%Y/%Y-%m/%Y-%m-{account_name}.csv'))
+    s3_current = instrument_boto3(boto3.resource('s3'))
+    with phase('Upload'):
+        s3_current.Bucket('as-cloudwatch-metrics-for-s3').upload_file(output_filename, metric_start_date.strftime(f'%Y/%Y-%m/%Y-%m-{account_name}.csv'))
     return 0    
         
@@ -9,9 +9,11 @@ Description: this script provides iteration through the list of AWS accounts and
 
 import json
 import boto3
+from lambda_instrumentation import instrument_handler, instrument_boto3
 
-client = boto3.client('lambda')
+client = instrument_boto3(boto3.client('lambda'))
 
+@instrument_handler
 def lambda_handler(event, context):
     default_accounts = ['data', 'qgdata', 'datalake', 'opra_dev', 'opra_analytics', 
                 'index', 'equityrefdata', 'futuresrefdata', 'china-data', 
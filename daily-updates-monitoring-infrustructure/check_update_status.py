@@ -5,6 +5,8 @@ import math
 import os
 from typing import Any
 import dateutil.tz
+from lambda_instrumentation import instrument_handler, instrument_boto3, phase
+from lambda_retry import start_invocation, retry, BOTOCORE_CONFIG
 
 
 alert_message = '''
@@ -30,19 +32,22 @@ Algoseek Team
 '''
 
 
+@retry()
 def send_sns_alert(sns_client, message: str) -> None:
     """
     Send a message to the SNS topic on alert/failure
 
     :param message: The error message to sent
     """
-    sns_client.publish(
-        TopicArn=os.getenv('SNS_TOPIC_ARN'),
-        Message=message,
-        Subject="Daily Updates Monitoring System",
-    )
+    with phase('SendAlert'):
+        sns_client.publish(
+            TopicArn=os.getenv('SNS_TOPIC_ARN'),
+            Message=message,
+            Subject="Daily Updates Monitoring System",
+        )
 
 
+@retry()
 def get_dynamo_db_record(dynamodb_table, bkg_id: str, tradedate: str) -> Any:
     """
     Get a record of daily updates from the DynamoDB table
@@ -54,7 +59,8 @@ def get_dynamo_db_record(dynamodb_table, bkg_id: str, tradedate: str) -> Any:
         'bucketgroup_text_id': bkg_id,
         'tradedate': tradedate
     }
-    item = dynamodb_table.get_item(Key=lookup_key).get('Item')
+    with phase('GetRecord'):
+        item = dynamodb_table.get_item(Key=lookup_key).get('Item')
     return item
 
 
@@ -71,16 +77,18 @@ def get_start_interval_to_check(days_offset: int, intraday_period_minutes: int)
     return start_interval
 
 
+@instrument_handler
 def lambda_handler(event, context):
+    start_invocation(context)
     bkg_text_id = event['bkg_text_id']
     bkg_updates = event['bkg_updates']
     expected_time = bkg_updates['expected_time']
     timeout_minutes = bkg_updates['timeout_minutes']
     bucket_name = bkg_updates['bucket_name']
 
-    session = boto3.Session(region_name='us-east-1',)
-    dynamodb = session.resource('dynamodb')
-    sns = session.client("sns")
+    session = instrument_boto3(boto3.Session(region_name='us-east-1',))
+    dynamodb = session.resource('dynamodb', config=BOTOCORE_CONFIG)
+    sns = session.client("sns", config=BOTOCORE_CONFIG)
     dynamodb_table = dynamodb.Table(os.getenv('TABLE_NAME'))
 
     # Get current time in EDT timezone
@@ -5,6 +5,12 @@ import copy
 import boto3
 import math
 import os
+from lambda_instrumentation import instrument_handler, instrument_boto3, phase, count, urlopen
+from lambda_retry import start_invocation, retry_call
+
+
+# seconds to wait for the Metadata API to connect and to respond
+REQUEST_TIMEOUT = 30
 
 
 def request(
@@ -36,7 +42,8 @@ def request(
         # Send a POST request to get the token
         req = urllib.request.Request(f"{base_url}/{token_url}", login_data)
         req.add_header("Content-Type", "application/json")
-        response = urllib.request.urlopen(req)
+        count('MetadataLogins')
+        response = retry_call(urlopen, req, timeout=REQUEST_TIMEOUT)
         token_data = json.loads(response.read().decode())
         access_token = token_data['token']
         # Use the access token to send a GET request to another API endpoint
@@ -47,7 +54,7 @@ def request(
         params_string = "&".join([f"{key}={value}" for key, value in params.items()])
         full_url = f"{base_url}/{url.lstrip('/')}?{params_string}" if params_string else f"{base_url}/{url.lstrip('/')}"
         req = urllib.request.Request(full_url, headers=headers)
-        response = urllib.request.urlopen(req)
+        response = retry_call(urlopen, req, timeout=REQUEST_TIMEOUT)
         # Checking status code of response
         if response.status != 200:
             raise RuntimeError("Couldn't reach the endpoint: {full_url}")
@@ -279,12 +286,16 @@ def delete_scheduler(
     )
 
 
+@instrument_handler
 def lambda_handler(event, context):
-    session = boto3.Session(region_name='us-east-1')
+    start_invocation(context)
+    session = instrument_boto3(boto3.Session(region_name='us-east-1'))
     scheduler = session.client('scheduler')
 
-    bkgs_to_monitor = get_bkgs_to_monitor()
-    existng_event_bridge_rules = list_scheduler_rules(scheduler)   # List of dict
+    with phase('GetBucketgroups'):
+        bkgs_to_monitor = get_bkgs_to_monitor()
+    with phase('ListSchedules'):
+        existng_event_bridge_rules = list_scheduler_rules(scheduler)   # List of dict
     existng_event_bridge_rules = {
         rule['Name'].replace('bkg_update_monitor_', ''): rule for rule in existng_event_bridge_rules
     }
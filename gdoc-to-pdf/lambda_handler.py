@@ -9,6 +9,8 @@ from botocore.exceptions import ClientError
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
+from lambda_instrumentation import instrument_handler, instrument_boto3, instrument_requests, phase, count
+from lambda_retry import start_invocation, retry
 
 
 # metadata API connection
@@ -17,17 +19,21 @@ metadata_api_name = os.getenv('metadata_api_name')
 metadata_api_secret = os.getenv('metadata_api_secret')
 
 
-session = boto3.Session()
+session = instrument_boto3(boto3.Session())
 s3 = session.resource('s3')
+instrument_requests()
 
 
 download_location = pathlib.Path('/tmp/')
 
+# seconds to wait for the metadata API to connect and to respond
+request_timeout = 30
+
 
 def get_secret(secret_name: str, region_name: str = 'us-east-1') -> dict:
 
     # Create a Secrets Manager client
-    session = boto3.session.Session()
+    session = instrument_boto3(boto3.session.Session())
     client = session.client(
         service_name='secretsmanager',
         region_name=region_name
@@ -47,6 +53,7 @@ def get_secret(secret_name: str, region_name: str = 'us-east-1') -> dict:
     return json.loads(secret)
 
 
+@retry()
 def get_metadata_api_headers() -> dict:
     
     auth_token_url = url_prefix + 'login/access_token/'
@@ -55,18 +62,28 @@ def get_metadata_api_headers() -> dict:
         'secret': metadata_api_secret
     }
 
-    r = requests.post(auth_token_url, data=json.dumps(payload))
-    assert r.status_code == 200, r.text
+    count('MetadataLogins')
+    r = requests.post(auth_token_url, data=json.dumps(payload), timeout=request_timeout)
+    r.raise_for_status()
     token = r.json()['token']
 
     headers = {"Authorization": f"Bearer {token}"}
     return headers
 
 
+@retry()
+def get_metadata_api(url: str, auth_headers: dict) -> requests.Response:
+    r = requests.get(url, headers=auth_headers, timeout=request_timeout)
+    # throttling and server errors are raised to be retried, other statuses are returned
+    if r.status_code == 429 or r.status_code >= 500:
+        r.raise_for_status()
+    return r
+
+
 def get_dataset_documentation_info(dataset_text_id: str, auth_headers: dict) -> dict:
     
     url = url_prefix + f'internal/dataset/text_id/{dataset_text_id}/'
-    r = requests.get(url, headers=auth_headers)
+    r = get_metadata_api(url, auth_headers)
     data = r.json()
     if r.status_code != 200:
         return {
@@ -80,7 +97,7 @@ def get_dataset_documentation_info(dataset_text_id: str, auth_headers: dict) ->
         }
     
     url = url_prefix + f'internal/documentation/ext/{documentation_id}/'
-    r = requests.get(url, headers=auth_headers)
+    r = get_metadata_api(url, auth_headers)
     data = r.json()
     if r.status_code != 200:
         return {
@@ -106,30 +123,7 @@ def get_dataset_documentation_info(dataset_text_id: str, auth_headers: dict) ->
     return {'status_code': 200, 'message': 'OK', 'data': doc_data}
     
     
-def retry(times, exceptions):
-    """
-    Retry Decorator
-    Retries the wrapped function/method `times` times if the exceptions listed
-    in ``exceptions`` are thrown
-    :param times: The number of times to repeat the wrapped function/method
-    :type times: Int
-    :param Exceptions: Lists of exceptions that trigger a retry attempt
-    :type Exceptions: Tuple of Exceptions
-    """
-    def decorator(func):
-        def newfn(*args, **kwargs):
-            attempt = 0
-            while attempt < times:
-                try:
-                    return func(*args, **kwargs)
-                except exceptions:
-                    attempt += 1
-            return func(*args, **kwargs)
-        return newfn
-    return decorator
-
-
-@retry(times=2, exceptions=(Exception, ))
+@retry(max_attempts=3)
 def download_as_pdf(service, file_id: str, output_filename: str) -> dict:
     request = service.files().export_media(fileId=file_id, mimeType='application/pdf')
     with open(output_filename, 'wb') as fh:
@@ -137,6 +131,7 @@ def download_as_pdf(service, file_id: str, output_filename: str) -> dict:
         done = False
         while done is False:
             status, done = downloader.next_chunk()
+            count('GoogleDriveChunks')
             print(f"Download {int(status.progress() * 100)}%.")
 
 
@@ -150,19 +145,23 @@ def generate_documentation_pdf(service, source_path: str, bucket_name: str, obje
     local_filename = download_location / object_name
     
     try:
-        download_as_pdf(service, file_id, local_filename)
+        with phase('Download'):
+            download_as_pdf(service, file_id, local_filename)
 
-        s3.meta.client.upload_file(
-            str(local_filename), bucket_name, object_name,
-            ExtraArgs={'ContentType': 'application/pdf', 'ContentDisposition': 'inline'}
-        )
+        with phase('Upload'):
+            s3.meta.client.upload_file(
+                str(local_filename), bucket_name, object_name,
+                ExtraArgs={'ContentType': 'application/pdf', 'ContentDisposition': 'inline'}
+            )
         return {'status_code': 200, 'message': 'OK'}
         
     except Exception as e:
         return {'status_code': 500, 'message': str(e)}
 
 
+@instrument_handler
 def lambda_handler(event, context):
+    start_invocation(context)
 
     secret_name = "aws-lambda-gdoc-credentials"
     credentials = service_account.Credentials.from_service_account_info(
@@ -174,7 +173,8 @@ def lambda_handler(event, context):
 
     response_list = []  # a list of statuses for each text id provided
     for text_id in event['dataset_text_ids']:
-        response = get_dataset_documentation_info(text_id, get_metadata_api_headers())
+        with phase('GetDocumentationInfo'):
+            response = get_dataset_documentation_info(text_id, get_metadata_api_headers())
         data_doc = response.pop('data')
 
         if response['status_code'] == 200:
@@ -0,0 +1,172 @@
+"""
+Title: lambda_instrumentation
+Description: hot path instrumentation shared by the Lambda functions of this
+            repository. Times named phases, counts outbound AWS and HTTP calls,
+            marks cold starts and emits everything as one CloudWatch Embedded
+            Metric Format (EMF) log line per invocation.
+
+usage:
+    from lambda_instrumentation import instrument_handler, instrument_boto3, phase, count
+
+    s3 = instrument_boto3(boto3.resource('s3'))
+
+    @instrument_handler
+    def lambda_handler(event, context):
+        with phase('Upload'):
+            ...
+"""
+
+import os
+import json
+import time
+import functools
+import threading
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Tuple
+from urllib.parse import urlparse
+
+
+NAMESPACE = os.getenv('METRICS_NAMESPACE', 'AWSInfrastructure/Lambda')
+FUNCTION_NAME = os.getenv('AWS_LAMBDA_FUNCTION_NAME', 'local')
+
+# CloudWatch accepts up to 100 metrics per EMF directive
+MAX_METRICS_PER_LINE = 100
+
+_cold_start = True
+_lock = threading.Lock()
+_metrics: Dict[str, Tuple[float, str]] = {}
+
+
+def _add(name: str, value: float, unit: str) -> None:
+    with _lock:
+        current, _ = _metrics.get(name, (0, unit))
+        _metrics[name] = (current + value, unit)
+
+
+def count(name: str, value: int = 1) -> None:
+    """
+    Increments a counter of the current invocation
+
+    :param name: The metric name, e.g. MetadataLogins
+    :param value: The increment
+    """
+    _add(name, value, 'Count')
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Times a named phase of the handler, repeated phases are summed up
+
+    :param name: The phase name, reported as the <name>Duration metric
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(f'{name}Duration', (time.perf_counter() - start) * 1000, 'Milliseconds')
+
+
+def _count_aws_call(event_name: str = '', **kwargs) -> None:
+    # event name format is before-send.<service>.<operation>
+    _, service, operation = event_name.split('.', 2)
+    count('AWSCalls')
+    count(f'AWSCalls.{service}.{operation}')
+
+
+def instrument_boto3(target: Any) -> Any:
+    """
+    Counts the outbound requests (retries included) of a boto3 session, client or resource.
+    A session counts the requests of the clients and resources created from it afterwards.
+
+    :param target: The boto3 Session, client or resource
+    return: Returns the target
+    """
+    if hasattr(target, 'events'):
+        events = target.events
+    elif hasattr(target.meta, 'events'):
+        events = target.meta.events
+    else:
+        events = target.meta.client.meta.events
+    events.register('before-send', _count_aws_call, unique_id='lambda_instrumentation')
+    return target
+
+
+def _count_http_call(url: str) -> None:
+    count('HTTPCalls')
+    host = urlparse(url).hostname
+    if host:
+        count(f'HTTPCalls.{host}')
+
+
+def urlopen(url: Any, *args, **kwargs) -> Any:
+    """
+    Counted replacement of urllib.request.urlopen
+    """
+    _count_http_call(url.full_url if isinstance(url, urllib.request.Request) else url)
+    return urllib.request.urlopen(url, *args, **kwargs)
+
+
+def instrument_requests() -> None:
+    """
+    Counts all requests sent by the requests library, module level helpers included
+    """
+    import requests
+
+    original_send = requests.Session.send
+    if getattr(original_send, '_instrumented', False):
+        return
+
+    @functools.wraps(original_send)
+    def send(self, request, **kwargs):
+        _count_http_call(request.url)
+        return original_send(self, request, **kwargs)
+
+    send._instrumented = True
+    requests.Session.send = send
+
+
+def emit() -> None:
+    """
+    Prints the metrics collected so far as EMF log lines and resets them
+    """
+    with _lock:
+        metrics = dict(_metrics)
+        _metrics.clear()
+    names = sorted(metrics)
+    for i in range(0, len(names), MAX_METRICS_PER_LINE):
+        chunk = names[i:i + MAX_METRICS_PER_LINE]
+        line = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': NAMESPACE,
+                    'Dimensions': [['FunctionName']],
+                    'Metrics': [{'Name': name, 'Unit': metrics[name][1]} for name in chunk]
+                }]
+            },
+            'FunctionName': FUNCTION_NAME,
+        }
+        line.update({name: metrics[name][0] for name in chunk})
+        print(json.dumps(line))
+
+
+def instrument_handler(handler: Callable) -> Callable:
+    """
+    Decorates a Lambda handler: marks cold/warm start, times the whole
+    invocation and emits the collected metrics when it returns or raises
+    """
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _cold_start
+        with _lock:
+            _metrics.clear()
+        count('ColdStart', 1 if _cold_start else 0)
+        _cold_start = False
+        try:
+            with phase('Handler'):
+                return handler(event, context)
+        finally:
+            emit()
+    return wrapper
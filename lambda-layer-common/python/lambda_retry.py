@@ -0,0 +1,212 @@
+"""
+Title: lambda_retry
+Description: retries with exponential backoff and full jitter shared by the
+            Lambda functions of this repository. Retries are limited by a per
+            invocation budget and by the time left before the Lambda timeout,
+            and only errors classified as transient (throttling, 5xx,
+            connection failures) are retried.
+
+usage:
+    from lambda_retry import start_invocation, retry, retry_call, BOTOCORE_CONFIG
+
+    dynamodb = session.resource('dynamodb', config=BOTOCORE_CONFIG)
+
+    @retry()
+    def get_token():
+        ...
+
+    def lambda_handler(event, context):
+        start_invocation(context)
+        response = retry_call(metric.get_statistics, Dimensions=dimensions)
+"""
+
+import time
+import random
+import socket
+import functools
+import threading
+import urllib.error
+from typing import Any, Callable, Optional
+
+from botocore.config import Config
+from lambda_instrumentation import count
+
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.5    # seconds
+DEFAULT_MAX_DELAY = 10      # seconds
+DEFAULT_RETRY_BUDGET = 20   # retries per invocation
+# time left to handle the error before the Lambda times out
+DEADLINE_MARGIN_SECONDS = 2
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_AWS_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException',
+    'TransactionInProgressException', 'RequestLimitExceeded', 'SlowDown',
+    'RequestTimeout', 'RequestTimeoutException', 'InternalError', 'InternalFailure',
+    'ServiceUnavailable', 'LimitExceededException',
+}
+RETRYABLE_GOOGLE_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'backendError')
+
+# botocore config disabling its own retries where lambda_retry wraps the calls
+BOTOCORE_CONFIG = Config(retries={'total_max_attempts': 1})
+
+
+class RetryBudget(object):
+    """
+    The number of retries left to all the calls of one invocation
+    """
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def consume(self) -> bool:
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+_budget = RetryBudget(DEFAULT_RETRY_BUDGET)
+_deadline: Optional[float] = None
+
+
+def start_invocation(context: Any = None, budget: int = DEFAULT_RETRY_BUDGET) -> None:
+    """
+    Resets the retry budget and takes the deadline from the Lambda context
+
+    :param context: The Lambda context, None outside of Lambda
+    :param budget: The number of retries allowed in this invocation
+    """
+    global _budget, _deadline
+    _budget = RetryBudget(budget)
+    if context is not None:
+        remaining = context.get_remaining_time_in_millis() / 1000
+        _deadline = time.monotonic() + remaining - DEADLINE_MARGIN_SECONDS
+    else:
+        _deadline = None
+
+
+def _is_retryable_botocore(error: Exception) -> Optional[bool]:
+    try:
+        from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+    except ImportError:
+        return None
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code')
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        return code in RETRYABLE_AWS_ERROR_CODES or status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+    return None
+
+
+def _is_retryable_google(error: Exception) -> Optional[bool]:
+    try:
+        from googleapiclient.errors import HttpError
+    except ImportError:
+        return None
+    if isinstance(error, HttpError):
+        if error.resp.status in RETRYABLE_STATUS_CODES:
+            return True
+        content = error.content.decode('utf-8', 'replace') if isinstance(error.content, bytes) else str(error.content)
+        return error.resp.status == 403 and any(reason in content for reason in RETRYABLE_GOOGLE_REASONS)
+    return None
+
+
+def _is_retryable_requests(error: Exception) -> Optional[bool]:
+    try:
+        import requests
+    except ImportError:
+        return None
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Classifies botocore, Google API, requests and urllib errors as transient or not
+
+    :param error: The error raised by the call
+    """
+    for classify in (_is_retryable_botocore, _is_retryable_google, _is_retryable_requests):
+        retryable = classify(error)
+        if retryable is not None:
+            return retryable
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (urllib.error.URLError, socket.timeout, TimeoutError, ConnectionError))
+
+
+def _get_retry_after(error: Exception) -> float:
+    headers = getattr(error, 'headers', None)
+    if headers is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+    try:
+        return float(headers.get('Retry-After', 0)) if headers is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def retry_call(
+    func: Callable,
+    *args,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    base_delay: float = DEFAULT_BASE_DELAY,
+    max_delay: float = DEFAULT_MAX_DELAY,
+    retryable: Callable[[Exception], bool] = is_retryable,
+    **kwargs
+) -> Any:
+    """
+    Calls the function retrying transient errors with exponential backoff and full jitter.
+    The last error is raised once attempts, the invocation budget or the time run out.
+
+    :param func: The function to call with the rest of the arguments
+    :param max_attempts: The maximum number of calls
+    :param base_delay: The upper bound of the first delay in seconds, doubled each retry
+    :param max_delay: The upper bound of any delay in seconds
+    :param retryable: The error classifier
+    """
+    attempt = 1
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_attempts or not retryable(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            delay = max(delay, min(max_delay, _get_retry_after(e)))
+            if _deadline is not None and time.monotonic() + delay > _deadline:
+                raise
+            if not _budget.consume():
+                raise
+            print(f'Retrying {getattr(func, "__name__", func)} in {delay:.2f}s after: {e}')
+            count('Retries')
+            time.sleep(delay)
+            attempt += 1
+
+
+def retry(
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    base_delay: float = DEFAULT_BASE_DELAY,
+    max_delay: float = DEFAULT_MAX_DELAY,
+    retryable: Callable[[Exception], bool] = is_retryable
+) -> Callable:
+    """
+    Decorator form of retry_call
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return retry_call(
+                func, *args, max_attempts=max_attempts, base_delay=base_delay,
+                max_delay=max_delay, retryable=retryable, **kwargs
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,111 @@
+#
+# Reads monitoring_db_table items archived to S3 after DynamoDB TTL expiration
+#
+# usage: python3 archive_reader.py monitoring-db-archive 20230101 20230131
+#        python3 archive_reader.py monitoring-db-archive 20230101 20230131 eq_taq_1min
+#
+
+import sys
+import gzip
+import json
+from typing import Any, Dict, Iterator, Optional
+
+import boto3
+
+
+DEFAULT_PREFIX = 'monitoring_db_table'
+
+
+def list_archive_keys(
+    s3_client,
+    bucket_name: str,
+    tradedate_from: str,
+    tradedate_to: str,
+    prefix: str = DEFAULT_PREFIX
+) -> Iterator[str]:
+    """
+    Lists archive files of the trading date partitions within the range
+
+    :param bucket_name: The archive S3 bucket
+    :param tradedate_from: The first trading date in yyyymmdd format
+    :param tradedate_to: The last trading date in yyyymmdd format (inclusive)
+    :param prefix: The key prefix the archiver writes partitions under
+    """
+    partition_prefix = f'{prefix}/tradedate='
+    paginator = s3_client.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=bucket_name,
+        Prefix=partition_prefix,
+        StartAfter=partition_prefix + tradedate_from
+    )
+    for page in pages:
+        for obj in page.get('Contents', []):
+            tradedate = obj['Key'][len(partition_prefix):].split('/', 1)[0]
+            # keys are listed in order, nothing left within the range
+            if tradedate > tradedate_to:
+                return
+            yield obj['Key']
+
+
+def read_archived_items(
+    bucket_name: str,
+    tradedate_from: str,
+    tradedate_to: str,
+    bucketgroup_text_id: Optional[str] = None,
+    prefix: str = DEFAULT_PREFIX,
+    session: Optional[boto3.Session] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Reads archived items for the range of trading dates without touching DynamoDB.
+    Copies of an item written again by a retried archiver batch are skipped.
+
+    :param bucket_name: The archive S3 bucket
+    :param tradedate_from: The first trading date in yyyymmdd format
+    :param tradedate_to: The last trading date in yyyymmdd format (inclusive)
+    :param bucketgroup_text_id: Optional bucketgroup text id to filter items by
+    :param prefix: The key prefix the archiver writes partitions under
+    :param session: Optional boto3 session to read the archive with
+    """
+    session = session or boto3.Session(region_name='us-east-1')
+    s3 = session.client('s3')
+    seen = set()
+    for key in list_archive_keys(s3, bucket_name, tradedate_from, tradedate_to, prefix):
+        body = s3.get_object(Bucket=bucket_name, Key=key)['Body'].read()
+        for line in gzip.decompress(body).decode('utf-8').splitlines():
+            if not line:
+                continue
+            item = json.loads(line)
+            if bucketgroup_text_id and item['bucketgroup_text_id'] != bucketgroup_text_id:
+                continue
+            item_key = (item['bucketgroup_text_id'], item['tradedate'], item['modified'])
+            if item_key in seen:
+                continue
+            seen.add(item_key)
+            yield item
+
+
+def get_archived_item(
+    bucket_name: str,
+    bkg_id: str,
+    tradedate: str,
+    prefix: str = DEFAULT_PREFIX,
+    session: Optional[boto3.Session] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Gets an archived record of daily updates, the counterpart of a DynamoDB get_item.
+    An item written again after it expired is archived more than once,
+    the latest modified version is returned in that case.
+
+    :param bucket_name: The archive S3 bucket
+    :param bkg_id: The bucketgroup text id
+    :param tradedate: The trading date in yyyymmdd format
+    """
+    items = read_archived_items(bucket_name, tradedate, tradedate, bkg_id, prefix, session)
+    return max(items, key=lambda item: item['modified'], default=None)
+
+
+if __name__ == '__main__':
+    bucket_name, tradedate_from, tradedate_to = sys.argv[1:4]
+    bucketgroup_text_id = sys.argv[4] if len(sys.argv) > 4 else None
+    for item in read_archived_items(bucket_name, tradedate_from, tradedate_to, bucketgroup_text_id):
+        print(json.dumps(item))
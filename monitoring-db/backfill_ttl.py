@@ -0,0 +1,78 @@
+#
+# Sets the expire_at TTL attribute on monitoring_db_table items written
+#     before the retention was enabled. Items older than the retention
+#     horizon get a past timestamp and are archived to S3 by DynamoDB TTL.
+#
+# usage: python3 backfill_ttl.py
+#        python3 backfill_ttl.py monitoring_db_table 365
+#
+
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+
+def get_expiration_timestamp(tradedate: str, retention_days: int) -> Optional[int]:
+    """
+    Epoch seconds after which DynamoDB TTL removes the item,
+    or None if the trading date is not in yyyymmdd format
+
+    :param tradedate: The trading date in yyyymmdd format
+    :param retention_days: The number of days to keep the item after the trading date
+    """
+    try:
+        tradedate_dt = datetime.strptime(tradedate, '%Y%m%d')
+    except ValueError:
+        return None
+    expire_at = tradedate_dt.replace(tzinfo=timezone.utc) + timedelta(days=retention_days)
+    return int(expire_at.timestamp())
+
+
+def backfill(table_name: str, retention_days: int) -> int:
+    """
+    Sets expire_at on the items which do not have it yet
+
+    :param table_name: The monitoring DynamoDB table name
+    :param retention_days: The number of days to keep the item after the trading date
+    return: Returns the number of updated items
+    """
+    session = boto3.Session(region_name='us-east-1')
+    dynamodb_table = session.resource('dynamodb').Table(table_name)
+
+    updated = 0
+    scan_kwargs = {
+        'ProjectionExpression': 'bucketgroup_text_id, tradedate',
+        'FilterExpression': 'attribute_not_exists(expire_at)'
+    }
+    while True:
+        response = dynamodb_table.scan(**scan_kwargs)
+        for item in response['Items']:
+            expire_at = get_expiration_timestamp(item['tradedate'], retention_days)
+            if not expire_at:
+                print(f"Skipping {item}: unexpected trading date format")
+                continue
+            try:
+                dynamodb_table.update_item(
+                    Key=item,
+                    UpdateExpression='SET expire_at = :expire_at',
+                    ConditionExpression='attribute_exists(tradedate) AND attribute_not_exists(expire_at)',
+                    ExpressionAttributeValues={':expire_at': expire_at}
+                )
+                updated += 1
+            except ClientError as e:
+                # the item was rewritten with TTL or removed meanwhile
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return updated
+
+
+if __name__ == '__main__':
+    table_name = sys.argv[1] if len(sys.argv) > 1 else 'monitoring_db_table'
+    retention_days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    print(f"Updated {backfill(table_name, retention_days)} items")
@@ -0,0 +1,181 @@
+#
+# Latest update status of all bucketgroups on a trading day
+#     queried from the TradedateIndex GSI of monitoring_db_table
+#
+# usage: python3 latest_status.py 20230105
+#        python3 latest_status.py 20230105 monitoring_db_table
+#
+
+import sys
+import json
+import time
+import string
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+
+
+INDEX_NAME = 'TradedateIndex'
+DEFAULT_TABLE_NAME = 'monitoring_db_table'
+DEFAULT_SEGMENTS = 4
+CACHE_TTL_SECONDS = 60
+CACHE_MAX_SIZE = 32
+
+
+class TTLCache(object):
+    """
+    Thread-safe LRU cache with entries expiring after a fixed time
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+cache = TTLCache(CACHE_MAX_SIZE, CACHE_TTL_SECONDS)
+deserializer = TypeDeserializer()
+
+
+def get_segment_boundaries(segments: int) -> List[str]:
+    """
+    Splits the bucketgroup text id key space into segments by the first letter
+
+    :param segments: The number of segments to query in parallel
+    return: Returns the list of segments - 1 boundaries
+    """
+    letters = string.ascii_lowercase
+    segments = min(segments, len(letters))
+    step = len(letters) / segments
+    return [letters[round(i * step)] for i in range(1, segments)]
+
+
+def get_key_conditions(boundaries: Sequence[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Builds the sort key conditions covering the whole key space.
+    Adjacent BETWEEN ranges share the boundary value, duplicates are merged by the caller.
+
+    :param boundaries: The sorted bucketgroup text id boundaries
+    return: Returns the list of (condition expression, expression values) pairs
+    """
+    if not boundaries:
+        return [('tradedate = :tradedate', {})]
+    conditions = [
+        ('tradedate = :tradedate AND bucketgroup_text_id < :upper', {':upper': {'S': boundaries[0]}})
+    ]
+    for lower, upper in zip(boundaries, boundaries[1:]):
+        conditions.append((
+            'tradedate = :tradedate AND bucketgroup_text_id BETWEEN :lower AND :upper',
+            {':lower': {'S': lower}, ':upper': {'S': upper}}
+        ))
+    conditions.append(
+        ('tradedate = :tradedate AND bucketgroup_text_id >= :lower', {':lower': {'S': boundaries[-1]}})
+    )
+    return conditions
+
+
+def query_segment(
+    dynamodb_client,
+    table_name: str,
+    tradedate: str,
+    key_condition: Tuple[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Queries all pages of one segment of the trading day
+
+    :param table_name: The monitoring DynamoDB table name
+    :param tradedate: The trading date in yyyymmdd format
+    :param key_condition: The condition expression and its values
+    """
+    expression, values = key_condition
+    paginator = dynamodb_client.get_paginator('query')
+    pages = paginator.paginate(
+        TableName=table_name,
+        IndexName=INDEX_NAME,
+        KeyConditionExpression=expression,
+        ExpressionAttributeValues={':tradedate': {'S': tradedate}, **values}
+    )
+    items = []
+    for page in pages:
+        for item in page['Items']:
+            items.append({key: deserializer.deserialize(value) for key, value in item.items()})
+    return items
+
+
+def get_latest_status(
+    tradedate: str,
+    table_name: str = DEFAULT_TABLE_NAME,
+    segments: int = DEFAULT_SEGMENTS,
+    use_cache: bool = True,
+    session: Optional[boto3.Session] = None
+) -> Dict[str, Dict[str, str]]:
+    """
+    Gets the latest update status of all bucketgroups updated on a trading day.
+    Repeated calls within CACHE_TTL_SECONDS are served from the in-process cache.
+
+    :param tradedate: The trading date in yyyymmdd format
+    :param table_name: The monitoring DynamoDB table name
+    :param segments: The number of segments to query in parallel
+    :param use_cache: Set to False to bypass the cache and refresh it
+    :param session: Optional boto3 session to query DynamoDB with
+    return: Returns the dictionary of bucketgroup text id to its created/modified timestamps
+    """
+    cache_key = (table_name, tradedate)
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {bkg_id: dict(record) for bkg_id, record in cached.items()}
+
+    session = session or boto3.Session(region_name='us-east-1')
+    dynamodb_client = session.client('dynamodb')
+    key_conditions = get_key_conditions(get_segment_boundaries(max(segments, 1)))
+
+    with ThreadPoolExecutor(max_workers=len(key_conditions)) as executor:
+        results = executor.map(
+            lambda key_condition: query_segment(dynamodb_client, table_name, tradedate, key_condition),
+            key_conditions
+        )
+        status = {}
+        for items in results:
+            for item in items:
+                status[item['bucketgroup_text_id']] = {
+                    'created': item.get('created'),
+                    'modified': item.get('modified')
+                }
+
+    cache.put(cache_key, status)
+    return {bkg_id: dict(record) for bkg_id, record in status.items()}
+
+
+if __name__ == '__main__':
+    tradedate = sys.argv[1]
+    table_name = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_TABLE_NAME
+    print(json.dumps(get_latest_status(tradedate, table_name), indent=4, sort_keys=True))
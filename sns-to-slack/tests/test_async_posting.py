@@ -0,0 +1,172 @@
+"""
+Throughput of the async Slack posting mode against a local fake Slack API.
+
+The handler is the inline code of the CloudFormation template, it is loaded
+from there and pointed at the fake server through SLACK_BASE_URL.
+
+usage: python3 -m pytest sns-to-slack/tests
+"""
+
+import sys
+import json
+import time
+import types
+import asyncio
+import pathlib
+import textwrap
+import threading
+
+import pytest
+
+pytest.importorskip('boto3')
+pytest.importorskip('slack_sdk')
+web = pytest.importorskip('aiohttp.web')
+
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+TEMPLATE = ROOT / 'sns-to-slack' / 'CloudFormation_sns_to_slack_lambda.yaml'
+sys.path.insert(0, str(ROOT / 'lambda-layer-common' / 'python'))
+
+CHANNELS = 4
+MESSAGES_PER_CHANNEL = 5
+CHANNEL_RATE = 5.0          # messages per second
+RETRY_AFTER_SECONDS = 1
+RATE_LIMITED_CHANNEL = '#channel-0'
+LATENCY_SECONDS = 0.05     # fake Slack API response time
+
+
+def load_handler_source() -> str:
+    lines = TEMPLATE.read_text().splitlines()
+    start = next(i for i, line in enumerate(lines) if line.strip() == 'ZipFile: |')
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    body = []
+    for line in lines[start + 1:]:
+        if line.strip() and len(line) - len(line.lstrip()) <= indent:
+            break
+        body.append(line)
+    return textwrap.dedent('\n'.join(body))
+
+
+class FakeSlack(object):
+    """
+    chat.postMessage endpoint answering the first post to RATE_LIMITED_CHANNEL with 429
+    """
+
+    def __init__(self):
+        self.posts = []         # (monotonic time, channel) of accepted posts
+        self.rate_limited = []  # monotonic time of 429 responses
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.url = None
+
+    async def post_message(self, request):
+        if request.content_type == 'application/json':
+            payload = await request.json()
+        else:
+            payload = dict(await request.post())
+        channel = payload['channel']
+        if channel == RATE_LIMITED_CHANNEL and not self.rate_limited:
+            self.rate_limited.append(time.monotonic())
+            return web.json_response(
+                {'ok': False, 'error': 'ratelimited'}, status=429,
+                headers={'Retry-After': str(RETRY_AFTER_SECONDS)}
+            )
+        await asyncio.sleep(LATENCY_SECONDS)
+        self.posts.append((time.monotonic(), channel))
+        return web.json_response({'ok': True, 'channel': channel, 'ts': str(time.time())})
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post('/api/chat.postMessage', self.post_message)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}/api/'
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+class Context(object):
+
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+
+@pytest.fixture
+def fake_slack():
+    server = FakeSlack()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def handler(fake_slack, monkeypatch):
+    monkeypatch.setenv('SLACK_API_TOKEN', 'xoxb-test')
+    monkeypatch.setenv('SLACK_BASE_URL', fake_slack.url)
+    monkeypatch.setenv('SLACK_ASYNC_MODE', 'true')
+    monkeypatch.setenv('SLACK_CHANNEL_RATE', str(CHANNEL_RATE))
+    monkeypatch.setenv('SLACK_CHANNEL_BURST', '1')
+    monkeypatch.delenv('SUPPRESSION_TABLE', raising=False)
+    module = types.ModuleType('sns_to_slack')
+    exec(compile(load_handler_source(), str(TEMPLATE), 'exec'), module.__dict__)
+    assert module.ASYNC_MODE
+    return module.lambda_handler
+
+
+def make_event():
+    records = []
+    for i in range(CHANNELS * MESSAGES_PER_CHANNEL):
+        notification = {
+            'TopicArn': f'arn:aws:sns:us-east-1:123456789012:channel-{i % CHANNELS}',
+            'Subject': f'Alert {i}',
+            # too long to be coalesced, every record is a separate post
+            'Message': 'x' * 3000,
+        }
+        records.append({'eventSource': 'aws:sqs', 'messageId': str(i), 'body': json.dumps(notification)})
+    return {'Records': records}
+
+
+def test_async_posting_throughput(handler, fake_slack):
+    start = time.monotonic()
+    result = handler(make_event(), Context())
+    elapsed = time.monotonic() - start
+
+    total = CHANNELS * MESSAGES_PER_CHANNEL
+    throughput = len(fake_slack.posts) / elapsed
+    print(f'{len(fake_slack.posts)} posts in {elapsed:.2f}s, {throughput:.1f} posts/s')
+
+    assert result == {'batchItemFailures': []}
+    assert len(fake_slack.posts) == total
+
+    # channels are posted concurrently: above the rate of any single channel,
+    # and in less than half the time posting channel after channel would take
+    sequential_seconds = (
+        RETRY_AFTER_SECONDS
+        + CHANNELS * (MESSAGES_PER_CHANNEL - 1) / CHANNEL_RATE
+        + total * LATENCY_SECONDS
+    )
+    assert throughput > 1.5 * CHANNEL_RATE
+    assert elapsed < sequential_seconds / 2
+
+    # every channel stays within its rate
+    for channel in range(CHANNELS):
+        times = [t for t, c in fake_slack.posts if c == f'#channel-{channel}']
+        assert len(times) == MESSAGES_PER_CHANNEL
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        assert min(gaps) >= 1 / CHANNEL_RATE * 0.9
+
+    # the rate limited channel waited for Retry-After, the others did not
+    assert len(fake_slack.rate_limited) == 1
+    first_retry = min(t for t, c in fake_slack.posts if c == RATE_LIMITED_CHANNEL)
+    assert first_retry - fake_slack.rate_limited[0] >= RETRY_AFTER_SECONDS * 0.9
+    assert elapsed < RETRY_AFTER_SECONDS + MESSAGES_PER_CHANNEL / CHANNEL_RATE + 1